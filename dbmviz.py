@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import array
 import os
 import re
 import subprocess
@@ -8,103 +9,270 @@ import itertools
 
 infinity = 100000
 
-tikz_str_prefix = "\\documentclass{standalone}\n\n\\usepackage{xfp}\n\\usepackage{tikz}\n\\usetikzlibrary{calc, arrows.meta}\n\n\\newcommand{\\DBMPath}[6]{\n(\\fpeval{-(#3)},\\fpeval{-(#4)}) -- (\\fpeval{(#5) - (#4)}, \\fpeval{-(#4)}) -- (#1, \\fpeval{(#1) - (#5)}) -- (#1, #2) -- (\\fpeval{(#2) - (#6)}, #2) -- (\\fpeval{-(#3)}, \\fpeval{(#6) - (#3)}) -- cycle\n}\n\n\\newcommand{\\DBMAxes}[2]{\n\\coordinate (origin) at (0,0);\n\\node[label=above:$y$] (y-ext) at (0,#2 + 0.5) {};\n\\node[label=right:$x$] (x-ext) at (#1 + 0.5,0) {};\n\n\\foreach \\x in {0,..., #1}\n{\\node[label=below:$\\x$] (mark\\x) at (\\x, 0) {};\n\\draw ($(mark\\x) - (0,0.1)$) -- ($(mark\\x) + (0,0.1)$);}\n\\foreach \\y in {0,..., #2}\n{\\node[label=left:$\\y$] (mark\\y) at (0, \\y) {};\n\\draw ($(mark\\y) - (0.1,0)$) -- ($(mark\\y) + (0.1,0)$);}\n\n\\path[draw, ->]\n    (origin) edge (y-ext)\n    (origin) to (x-ext);\n}\n\n\n\\tikzset{Dot/.tip={Circle[length=4pt,sep=-2pt]}}\n\\newcommand{\\dbmyoffset}{0.3}\n\\newcommand{\\DBMAxis}[1]{\n\\coordinate (origin) at (0,0);\n\\node[label={[label distance=-3mm]right:$x$}] (x-ext) at (#1 + 0.5, -\\dbmyoffset) {};\n\n\\foreach \\x in {0,..., #1}\n{\\node[label=below:$\\x$] (mark\\x) at (\\x, -\\dbmyoffset) {};\n\\draw ($(mark\\x) - (0,0.1)$) -- ($(mark\\x) + (0,0.1)$);}\n\n\\path[draw, ->]\n    ($(origin) + (0, -\\dbmyoffset)$) to (x-ext);\n}\n\n\\begin{document}\n\\begin{tikzpicture}"
+tikz_str_preamble = "\\documentclass{standalone}\n\n\\usepackage{xfp}\n\\usepackage{tikz}\n\\usetikzlibrary{calc, arrows.meta}\n\n\\newcommand{\\DBMPath}[6]{\n(\\fpeval{-(#3)},\\fpeval{-(#4)}) -- (\\fpeval{(#5) - (#4)}, \\fpeval{-(#4)}) -- (#1, \\fpeval{(#1) - (#5)}) -- (#1, #2) -- (\\fpeval{(#2) - (#6)}, #2) -- (\\fpeval{-(#3)}, \\fpeval{(#6) - (#3)}) -- cycle\n}\n\n\\newcommand{\\DBMAxes}[2]{\n\\coordinate (origin) at (0,0);\n\\node[label=above:$y$] (y-ext) at (0,#2 + 0.5) {};\n\\node[label=right:$x$] (x-ext) at (#1 + 0.5,0) {};\n\n\\foreach \\x in {0,..., #1}\n{\\node[label=below:$\\x$] (mark\\x) at (\\x, 0) {};\n\\draw ($(mark\\x) - (0,0.1)$) -- ($(mark\\x) + (0,0.1)$);}\n\\foreach \\y in {0,..., #2}\n{\\node[label=left:$\\y$] (mark\\y) at (0, \\y) {};\n\\draw ($(mark\\y) - (0.1,0)$) -- ($(mark\\y) + (0.1,0)$);}\n\n\\path[draw, ->]\n    (origin) edge (y-ext)\n    (origin) to (x-ext);\n}\n\n\n\\tikzset{Dot/.tip={Circle[length=4pt,sep=-2pt]}}\n\\newcommand{\\dbmyoffset}{0.3}\n\\newcommand{\\DBMAxis}[1]{\n\\coordinate (origin) at (0,0);\n\\node[label={[label distance=-3mm]right:$x$}] (x-ext) at (#1 + 0.5, -\\dbmyoffset) {};\n\n\\foreach \\x in {0,..., #1}\n{\\node[label=below:$\\x$] (mark\\x) at (\\x, -\\dbmyoffset) {};\n\\draw ($(mark\\x) - (0,0.1)$) -- ($(mark\\x) + (0,0.1)$);}\n\n\\path[draw, ->]\n    ($(origin) + (0, -\\dbmyoffset)$) to (x-ext);\n}\n\n"
+tikz_str_begin = "\\begin{document}\n\\begin{tikzpicture}"
+tikz_str_prefix = tikz_str_preamble + tikz_str_begin
 tikz_str_suffix = "\n\\end{tikzpicture}\n\\end{document}\n"
 
 colors = ['red', 'green', 'blue', 'cyan', 'magenta', 'yellow']
 color_iter = itertools.cycle(colors)
 
+# Storage of the true and false DBMs, built once per number of clocks
+_true_cache = {}
+_false_cache = {}
+
+# From this many clocks (including the 0-clock) canonize uses the numba kernel, if numba is installed. The first
+# such canonize imports numba and compiles the kernel, or loads it from numba's cache: about 0.6s, or 0.4s cached.
+# At 16 clocks that is about a thousand pure Python canonizes, so it only pays off for scripts doing many of them.
+native_canonize_clocks = 16
+
+
+# Same updates as DBM.canonize as a plain triple loop, which numba compiles well
+def _canonize_kernel(D, n, inf):
+    for k in range(n):
+        for i in range(n):
+            if i == k:
+                continue
+            d_ik = D[i * n + k]
+            if d_ik == inf:
+                continue
+            for j in range(n):
+                if j == i or j == k:
+                    continue
+                d_kj = D[k * n + j]
+                if d_kj != inf and d_ik + d_kj < D[i * n + j]:
+                    D[i * n + j] = d_ik + d_kj
+
+
+# DBM.canonize unrolled for the 0-clock and two clocks. With the pivot and the diagonal skipped, each pivot only
+# updates the two entries between the other clocks. Entries are 0-0, 0-x, 0-y, x-0, x-x, x-y, y-0, y-x, y-y.
+def _canonize_3(D, inf):
+    # Pivot 0
+    if D[3] != inf and D[2] != inf and D[3] + D[2] < D[5]:
+        D[5] = D[3] + D[2]
+    if D[6] != inf and D[1] != inf and D[6] + D[1] < D[7]:
+        D[7] = D[6] + D[1]
+    # Pivot x
+    if D[1] != inf and D[5] != inf and D[1] + D[5] < D[2]:
+        D[2] = D[1] + D[5]
+    if D[7] != inf and D[3] != inf and D[7] + D[3] < D[6]:
+        D[6] = D[7] + D[3]
+    # Pivot y
+    if D[2] != inf and D[7] != inf and D[2] + D[7] < D[1]:
+        D[1] = D[2] + D[7]
+    if D[5] != inf and D[6] != inf and D[5] + D[6] < D[3]:
+        D[3] = D[5] + D[6]
+
+
+# Compiled on the first canonize of a large DBM, so numba is neither required nor imported for small ones.
+# False if numba is not installed.
+_native_canonize = None
+
+
+def get_native_canonize():
+    global _native_canonize
+    if _native_canonize is None:
+        try:
+            import numba
+            # numba can only cache next to a source file, not when the module is exec'd from a string
+            _native_canonize = numba.njit(cache='__file__' in globals())(_canonize_kernel)
+        except ImportError:
+            _native_canonize = False
+    return _native_canonize
+
 
 class DBM:
     @staticmethod
     def true(clocks: int):
-        dbm = DBM(clocks)
-        for c1 in range(1, clocks + 1):
-            for c2 in range(clocks + 1):
-                dbm[c1, c2] = infinity
-        for c2 in range(clocks + 1):
-            dbm[0, c2] = 0
-        return dbm
+        return DBM(clocks, DBM._true_storage(clocks))
 
     @staticmethod
     def false(clocks: int):
-        dbm = DBM(clocks)
-        dbm.dbm = [-1 for _ in range((clocks + 1)**2)]
-        return dbm
+        return DBM(clocks, DBM._false_storage(clocks))
+
+    # The cached storage is shared, it must only be handed to a DBM as its storage argument or through _share
+    @staticmethod
+    def _true_storage(clocks: int):
+        if clocks not in _true_cache:
+            storage = array.array('i', [infinity]) * (clocks + 1)**2
+            for c2 in range(clocks + 1):
+                storage[c2] = 0
+            _true_cache[clocks] = storage
+        return _true_cache[clocks]
+
+    @staticmethod
+    def _false_storage(clocks: int):
+        if clocks not in _false_cache:
+            _false_cache[clocks] = array.array('i', [-1]) * (clocks + 1)**2
+        return _false_cache[clocks]
 
     @staticmethod
     def zero(clocks: int):
         return DBM(clocks)
 
-    # Input clocks is excluding 0-clock
-    def __init__(self, clocks: int):
+    # Input clocks is excluding 0-clock. A given storage is shared, not copied, until the first write.
+    def __init__(self, clocks: int, storage=None):
         self.clocks = clocks + 1 # Including 0-clock
-        self.dbm = [0 for _ in range(self.clocks**2)]
+        if storage is None:
+            self.dbm = array.array('i', [0]) * self.clocks**2
+            self._owned = True
+        else:
+            self.dbm = storage
+            self._owned = False  # False while the storage may be shared, it is then copied before the first write
         self.color = next(color_iter)
 
+    def _share(self, storage):
+        self.dbm = storage
+        self._owned = False
+
+    def _own(self):
+        if not self._owned:
+            self.dbm = self.dbm[:]
+            self._owned = True
+
     def __getitem__(self, index: tuple[int, int]):
         return self.dbm[index[0] * self.clocks + index[1]]
 
     def __setitem__(self, index: tuple[int, int], value: int):
+        if not self._owned:
+            self._own()
         self.dbm[index[0] * self.clocks + index[1]] = value
 
     def is_consistent(self):
-        for c1 in range(self.clocks):
-            for c2 in range(self.clocks):
-                if -self[c1, c2] > self[c2, c1]:
+        D = self.dbm
+        n = self.clocks
+        for c1 in range(n):
+            for c2 in range(n):
+                if -D[c1 * n + c2] > D[c2 * n + c1]:
                     return False
         return True
 
+    # A negative cycle from a clock to itself means no valuation satisfies the DBM
+    def is_false(self):
+        D = self.dbm
+        n = self.clocks
+        return any(D[c * (n + 1)] < 0 for c in range(n))
+
+    # True when only the implicit constraints remain, i.e. all clocks are non-negative
+    def is_true(self):
+        if self.is_false():
+            return False
+        D = self.dbm
+        n = self.clocks
+        for c1 in range(n):
+            bound = 0 if c1 == 0 else infinity
+            for c2 in range(n):
+                if c1 != c2 and D[c1 * n + c2] != bound:
+                    return False
+        return True
+
+    # Floyd-Warshall with the pivot in the outer loop, working directly on the flat storage
     def canonize(self):
-        for c1 in range(self.clocks):
-            for c2 in range(self.clocks):
-                if c1 == c2:
+        self._own()
+        D = self.dbm
+        n = self.clocks
+        if n == 3:
+            _canonize_3(D, infinity)
+            return
+        if n >= native_canonize_clocks:
+            native_canonize = get_native_canonize()
+            if native_canonize:
+                native_canonize(D, n, infinity)
+                return
+        for k in range(n):
+            # Row k is not updated while k is the pivot, and only its finite entries can tighten anything
+            row_k = [(j, d_kj) for j, d_kj in enumerate(D[k * n:(k + 1) * n]) if j != k and d_kj != infinity]
+            if not row_k:
+                continue
+            for i in range(n):
+                if i == k:
                     continue
-                for c3 in range(self.clocks):
-                    if c3 == c1 or c3 == c2:
+                d_ik = D[i * n + k]
+                # A path through an unbounded edge is unbounded, so it can never tighten anything
+                if d_ik == infinity:
+                    continue
+                base = i * n
+                for j, d_kj in row_k:
+                    if j == i:
                         continue
-                    if self[c1, c2] > self[c1, c3] + self[c3, c2]:
-                        self[c1, c2] = self[c1, c3] + self[c3, c2] if self[c1, c3] != infinity and self[
-                            c3, c2] != infinity else infinity
+                    s = d_ik + d_kj
+                    if s < D[base + j]:
+                        D[base + j] = s
 
     def leq(self, clock1: int, clock2: int, value: int):
         self[clock1, clock2] = min(self[clock1, clock2], value)
-        if not self.is_consistent():
-            self.dbm = DBM.false().dbm
+        # The DBM is canonical, so a new contradiction can only be between the constraint and its opposite
+        if -self[clock1, clock2] > self[clock2, clock1]:
+            self._share(DBM._false_storage(self.clocks - 1))
+            return
         self.canonize()
 
+    # Drops a constraint and restores the bound implied by the others, the DBM stays canonical
     def free(self, clock1: int, clock2: int):
-        if clock1 == 0:
-            self[0, clock2] = 0
-        else:
-            self[clock1, clock2] = infinity
-
+        bound = 0 if clock1 == 0 else infinity
+        for clock3 in range(self.clocks):
+            if clock3 == clock1 or clock3 == clock2:
+                continue
+            if self[clock1, clock3] != infinity and self[clock3, clock2] != infinity:
+                bound = min(bound, self[clock1, clock3] + self[clock3, clock2])
+        self[clock1, clock2] = bound
+
+    def up(self):
+        for clock in range(1, self.clocks):
+            self[clock, 0] = infinity
+
+    def down(self):
+        for clock in range(1, self.clocks):
+            self[0, clock] = 0
+            for clock2 in range(1, self.clocks):
+                if clock2 != clock and self[clock2, clock] < self[0, clock]:
+                    self[0, clock] = self[clock2, clock]
+
+    # Every bound on the reset clock now goes through the 0-clock, so the result is canonical without canonize
     def reset(self, clock: int, value: int = 0):
-        self[clock, 0] = value
-        self[0, clock] = -value
-        for clock2 in range(1, self.clocks):
-            if clock2 != clock:
-                self[clock, clock2] = infinity
-                self[clock2, clock] = infinity
+        for clock2 in range(self.clocks):
+            if clock2 == clock:
+                continue
+            self[clock, clock2] = value + self[0, clock2]
+            self[clock2, clock] = self[clock2, 0] - value if self[clock2, 0] != infinity else infinity
+
+    # Extrapolation with lower and upper bounds, L and U hold a constant per clock with infinity for the 0-clock
+    def lu_extrapolate(self, L: list[int], U: list[int]):
+        self._own()
+        D = self.dbm
+        n = self.clocks
+        for c1 in range(n):
+            for c2 in range(n):
+                if c1 == c2:
+                    continue
+                d = D[c1 * n + c2]
+                if d > L[c1]:
+                    D[c1 * n + c2] = infinity
+                elif -d > U[c2]:
+                    D[c1 * n + c2] = -U[c2]
         self.canonize()
 
+    # Max bound extrapolation is LU extrapolation with the same constant as lower and upper bound
+    def extrapolate(self, M: list[int]):
+        self.lu_extrapolate(M, M)
+
     def copy(self):
-        dbm = DBM(self.clocks - 1)
-        dbm.dbm = self.dbm.copy()
+        dbm = DBM(self.clocks - 1, self.dbm)
+        self._owned = False
         dbm.color = self.color
         return dbm
 
     def __eq__(self, other):
-        return self.clocks == other.clocks and all(a == b for a, b in zip(self.dbm, other.dbm))
+        return self.clocks == other.clocks and self.dbm == other.dbm
 
     def __repr__(self):
         return self.__str__()
 
     def __str__(self):
-        if self == DBM.true(self.clocks - 1):
-            return "true"
-        elif self == DBM.false(self.clocks - 1):
+        if self.is_false():
             return "false"
+        elif self.is_true():
+            return "true"
 
         if self.clocks <= 3:
             clock_names = [None, 'x', 'y']
@@ -112,24 +280,28 @@ class DBM:
             clock_names = [None] + [f'c{i}' for i in range(1, self.clocks)]
 
         c = []
-        
-        for c1 in range(1, self.clocks):
-            if -self[0, c1] == self[c1, 0]:
-                c.append(f"{clock_names[c1]}={self[c1, 0]}")
+        D = self.dbm
+        n = self.clocks
+
+        for c1 in range(1, n):
+            upper, lower = D[c1 * n], D[c1]
+            if -lower == upper:
+                c.append(f"{clock_names[c1]}={upper}")
             else:
-                if self[c1, 0] != infinity:
-                    c.append(f"{clock_names[c1]}<={self[c1, 0]}")
-                if self[0, c1] != 0:
-                    c.append(f"{clock_names[c1]}>={-self[0, c1]}")
-
-            for c2 in range(c1 + 1, self.clocks):
-                if -self[c1, c2] == self[c2, c1]:
-                    c.append(f"{clock_names[c1]}-{clock_names[c2]}={self[c1, c2]}")
+                if upper != infinity:
+                    c.append(f"{clock_names[c1]}<={upper}")
+                if lower != 0:
+                    c.append(f"{clock_names[c1]}>={-lower}")
+
+            for c2 in range(c1 + 1, n):
+                d12, d21 = D[c1 * n + c2], D[c2 * n + c1]
+                if -d12 == d21:
+                    c.append(f"{clock_names[c1]}-{clock_names[c2]}={d12}")
                 else:
-                    if self[2, 1] != infinity:
-                        c.append(f"{clock_names[c2]}-{clock_names[c1]}<={self[c2, c1]}")
-                    if self[1, 2] != infinity:
-                        c.append(f"{clock_names[c1]}-{clock_names[c2]}<={self[c1, c2]}")
+                    if d21 != infinity:
+                        c.append(f"{clock_names[c2]}-{clock_names[c1]}<={d21}")
+                    if d12 != infinity:
+                        c.append(f"{clock_names[c1]}-{clock_names[c2]}<={d12}")
 
         return " and ".join(c)
 
@@ -148,8 +320,11 @@ def next_name():
 current_dbm = None
 
 name_re = re.compile(r"[a-zA-Z0-9_']+")
-constrain_re = re.compile(r"([a-zA-Z0-9_]+)\s*(<=|>=|<|>|=|==)\s*(-?\d+)")
-diff_constrain_re = re.compile(r"([a-zA-Z0-9_]+)\s*-\s*([a-zA-Z0-9_]+)\s*(<=|>=|<|>|=|==)\s*(-?\d+)")
+free_re = re.compile(r'([0xy])\s*-([0xy])\s*')
+
+# Two character operators come first, so that '<=' is not read as '<'
+constraint_ops = ['<=', '>=', '==', '<', '>', '=']
+clock_name_chars = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
 
 queued_commands = []
 
@@ -165,389 +340,379 @@ def get_input():
         return c
 
 
-if len(sys.argv) == 2:
-    queued_commands = sys.argv[1].split(';')
-elif len(sys.argv) != 1:
-    print("Incorrect command usage, try dbmviz.py [commands]. Commands are in quotes and separated by ';'")
-    exit(1)
-
-while True:
-    if current_dbm is None:
-        print("-: ", end="")
+# Splits e.g. ['x', '<=', '5'] or ['x-y>=-2'] into the clock names, the operator and the value
+def parse_constraint(command):
+    joined = ''.join(command)
+    for op in constraint_ops:
+        lhs, found, rhs = joined.partition(op)
+        if found:
+            break
     else:
-        print(f"{current_dbm}: ", end="")
+        return None
 
-    command = get_input().split(' ')
+    # Whitespace is allowed before the operator, after it and around the '-' of a difference
+    names = lhs.rstrip().split('-')
+    if len(names) == 2:
+        names = [names[0].rstrip(), names[1].lstrip()]
+    if len(names) > 2 or any(not name or not set(name) <= clock_name_chars for name in names):
+        return None
 
-    if len(command) == 0:
-        pass
+    rhs = rhs.lstrip()
+    digits = rhs[1:] if rhs.startswith('-') else rhs
+    if not digits.isdecimal():
+        return None
 
-    elif command[0] == 'example':
-        queued_commands += ['new zero', 'up', 'x <= 5', 'y>3', 'reset x', 'up', 'y<4', 'print', 'show']
+    return names, op, int(rhs)
 
-    elif command[0] == "new":
-        if len(command) < 2:
-            print("Incorrect command usage, new <true|false|zero> [name]")
-        else:
-            name = command[2] if len(command) >= 3 else next_name()
-            if name_re.fullmatch(name) is None:
-                print("Incorrect name, must match [a-zA-Z0-9_']+")
-                dbm = None
-            elif command[1] == "true":
-                dbm = DBM.true(2)
-            elif command[1] == "false":
-                dbm = DBM.false(2)
-            elif command[1] == "zero":
-                dbm = DBM.zero(2)
-            else:
-                print("Unknown DBM, try true, false or zero")
-                continue
-
-            dbms[name] = dbm
-            current_dbm = name
 
-    elif command[0] == 'copy':
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-            continue
-        if len(command) > 2:
-            print('Incorrect command usage, copy [name of copy]')
-            continue
-        if len(command) == 1:
-            name = current_dbm
-            while name in dbms:
-                name += '\''
-        if len(command) == 2:
-            if name_re.fullmatch(command[1]) is None:
-                print("Incorrect name, must match [a-zA-Z0-9_']+")
-                continue
-            else:
-                name = command[1]
+# Loading the packages takes most of a pdflatex run, so the preamble is dumped to a format on the first show
+# and later documents start from it. False if the format could not be built.
+_preamble_format = None
 
-        dbms[name] = dbms[current_dbm].copy()
-        dbms[name].color = next(color_iter)
-        current_dbm = name
 
+def get_preamble_format():
+    global _preamble_format
+    if _preamble_format is None:
+        dir = tempfile.mkdtemp(None, 'dbmviz_format_')
+        with open(os.path.join(dir, 'preamble.tex'), 'w') as f:
+            f.write(tikz_str_preamble + "\\dump\n")
+        p = subprocess.run(['pdflatex', '-ini', '-halt-on-error', '-jobname=preamble', '&pdflatex', 'preamble.tex'],
+                           cwd=dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _preamble_format = os.path.join(dir, 'preamble') if p.returncode == 0 else False
+    return _preamble_format
 
-    elif command[0] == "select":
-        if len(command) != 2:
-            print("Incorrect command usage, select <name>")
-        elif not command[1] in dbms:
-            print(f"I don't know the DBM '{command[1]}'")
-        else:
-            current_dbm = command[1]
 
-    elif command[0] == "print":
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-        elif len(command) == 2:
-            if not command[1] in dbms:
-                print(f"I don't know the DBM '{command[1]}'")
-            else:
-                print(dbms[command[1]])
-        elif len(command) > 2:
-            print("Incorrect command usage, print [name]")
-        else:
-            print(dbms[current_dbm])
+def _cmd_example(command):
+    global queued_commands
+    queued_commands += ['new zero', 'up', 'x <= 5', 'y>3', 'reset x', 'up', 'y<4', 'print', 'show']
 
-    elif constrain_re.fullmatch(''.join(command)) is not None:
-        match = constrain_re.fullmatch(''.join(command))
-        dbm = dbms[current_dbm]
 
-        if match[1] == "x":
-            clock = 1
-        elif match[1] == "y":
-            clock = 2
+def _cmd_new(command):
+    global current_dbm
+    if len(command) < 2:
+        print("Incorrect command usage, new <true|false|zero> [name]")
+    else:
+        name = command[2] if len(command) >= 3 else next_name()
+        if name_re.fullmatch(name) is None:
+            print("Incorrect name, must match [a-zA-Z0-9_']+")
+            dbm = None
+        elif command[1] == "true":
+            dbm = DBM.true(2)
+        elif command[1] == "false":
+            dbm = DBM.false(2)
+        elif command[1] == "zero":
+            dbm = DBM.zero(2)
         else:
-            print(f"Unknown clock '{match[1]}', try x or y")
-            continue
+            print("Unknown DBM, try true, false or zero")
+            return
 
-        value = int(match[3])
-        if value < 0:
-            print("Cannot constrain to negative value")
-            continue
-
-        if match[2] == "<=" or match[2] == "<":
-            dbm.leq(clock, 0, value)
-        elif match[2] == ">=" or match[2] == ">":
-            dbm.leq(0, clock, -value)
-        elif match[2] == "=" or match[2] == "==":
-            dbm.leq(clock, 0, value)
-            dbm.leq(0, clock, -value)
-
-    elif diff_constrain_re.fullmatch(''.join(command)) is not None:
-        match = diff_constrain_re.fullmatch(''.join(command))
-        dbm = dbms[current_dbm]
+        dbms[name] = dbm
+        current_dbm = name
 
-        clock = [0, 0]
-        for i in [1, 2]:
-            if match[i] == "x":
-                clock[i - 1] = 1
-            elif match[i] == "y":
-                clock[i - 1] = 2
-            else:
-                print(f"Unknown clock '{match[i]}', try x or y")
-                continue
 
-        value = int(match[4])
+def _cmd_copy(command):
+    global current_dbm
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+        return
+    if len(command) > 2:
+        print('Incorrect command usage, copy [name of copy]')
+        return
+    if len(command) == 1:
+        name = current_dbm
+        while name in dbms:
+            name += '\''
+    if len(command) == 2:
+        if name_re.fullmatch(command[1]) is None:
+            print("Incorrect name, must match [a-zA-Z0-9_']+")
+            return
+        else:
+            name = command[1]
 
-        if match[3] == "<=" or match[3] == "<":
-            dbm.leq(clock[0], clock[1], value)
-        elif match[3] == ">=" or match[3] == ">":
-            dbm.leq(clock[1], clock[0], -value)
-        elif match[3] == "=" or match[3] == "==":
-            dbm.leq(clock[0], clock[1], value)
-            dbm.leq(clock[1], clock[0], -value)
+    dbms[name] = dbms[current_dbm].copy()
+    dbms[name].color = next(color_iter)
+    current_dbm = name
 
-    elif command[0] == "up":
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-        else:
-            dbm = dbms[current_dbm]
-            dbm.free(1, 0)
-            dbm.free(2, 0)
 
-    elif command[0] == "down":
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-        else:
-            dbm = dbms[current_dbm]
-            dbm.free(0, 1)
-            dbm.free(0, 2)
+def _cmd_select(command):
+    global current_dbm
+    if len(command) != 2:
+        print("Incorrect command usage, select <name>")
+    elif not command[1] in dbms:
+        print(f"I don't know the DBM '{command[1]}'")
+    else:
+        current_dbm = command[1]
 
-    elif command[0] == "reset":
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-        else:
-            dbm = dbms[current_dbm]
-            if len(command) != 2:
-                print("Incorrect command usage, reset <clock>")
-            elif command[1] == "x":
-                dbm.reset(1)
-            elif command[1] == "y":
-                dbm.reset(2)
-            else:
-                print(f"Unknown clock '{command[1]}', try x or y")
 
-    elif command[0] == 'color':
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
+def _cmd_print(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+    elif len(command) == 2:
+        if not command[1] in dbms:
+            print(f"I don't know the DBM '{command[1]}'")
         else:
-            dbm = dbms[current_dbm]
-            if len(command) != 2:
-                print("Incorrect command usage, color <color> // Any tikz color will work")
-            else:
-                dbm.color = command[1]
+            print(dbms[command[1]])
+    elif len(command) > 2:
+        print("Incorrect command usage, print [name]")
+    else:
+        print(dbms[current_dbm])
 
-    elif command[0] == 'dbm':
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-            continue
 
-        dbm = dbms[current_dbm]
+def _cmd_up(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+    else:
+        dbms[current_dbm].up()
 
 
-        def rep_inf(x):
-            return '∞' if x == infinity else x
+def _cmd_down(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+    else:
+        dbms[current_dbm].down()
 
 
-        names = ['0', 'x', 'y']
-        s = " c-r<n " + ''.join(f'|  {s}  ' for s in names) + '\n'
-        for x1, s1 in enumerate(names):
-            s += '+'.join(['-' * 7] + ['-' * 5] * len(names)) + '\n'
-            s += f'{s1: ^7}' + ''.join(f'|{rep_inf(dbm[x1, x2]): ^5}' for x2, _ in enumerate(names)) + '\n'
+def _cmd_reset(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+    else:
+        dbm = dbms[current_dbm]
+        if len(command) != 2:
+            print("Incorrect command usage, reset <clock>")
+        elif command[1] == "x":
+            dbm.reset(1)
+        elif command[1] == "y":
+            dbm.reset(2)
+        else:
+            print(f"Unknown clock '{command[1]}', try x or y")
 
-        print(s)
 
-    elif command[0] == 'free':
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-            continue
+def _cmd_color(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+    else:
+        dbm = dbms[current_dbm]
+        if len(command) != 2:
+            print("Incorrect command usage, color <color> // Any tikz color will work")
+        else:
+            dbm.color = command[1]
 
-        cre = re.compile(r'([0xy])\s*-([0xy])\s*')
-        if len(command) != 2 or not cre.fullmatch(''.join(command[1:])):
-            print('Incorrect command usage, free <constraint>, e.g. x-0, 0-y, y-x, ...')
 
-        dbm = dbms[current_dbm]
-        match = cre.fullmatch(''.join(command[1:]))
-        x1 = ['0', 'x', 'y'].index(match[1])
-        x2 = ['0', 'x', 'y'].index(match[2])
+def _cmd_dbm(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+        return
 
-        dbm.free(x1, x2)
-        dbm.canonize()
+    dbm = dbms[current_dbm]
 
-    elif command[0] == 'extrapolate':
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-            continue
-        dbm = dbms[current_dbm]
 
-        if len(command) > 3 or len(command) == 1:
-            print('Incorrect command usage, extrapolate <constant>, or extrapolate <x constant> <y constant>')
-            continue
-
-        if not command[1].isdigit():
-            print(f'{command[1]} is not an integer')
-            continue
-        M = [infinity] * 3
-        M[1] = int(command[1])
-        if len(command) == 2:
-            M[2] = M[1]
-        else:
-            if not command[2].isdigit():
-                print(f'{command[2]} is not an integer')
-                continue
-            M[2] = int(command[2])
+    def rep_inf(x):
+        return '∞' if x == infinity else x
 
-        for x1 in [0,1,2]:
-            for x2 in [0,1,2]:
-                if x1 == x2:
-                    continue
-                if dbm[x1,x2] > M[x1]:
-                    dbm[x1,x2] = infinity
-                elif -dbm[x1,x2] > M[x2]:
-                    dbm[x1,x2] = -M[x2]
 
-        dbm.canonize()
+    names = ['0', 'x', 'y']
+    s = " c-r<n " + ''.join(f'|  {s}  ' for s in names) + '\n'
+    for x1, s1 in enumerate(names):
+        s += '+'.join(['-' * 7] + ['-' * 5] * len(names)) + '\n'
+        s += f'{s1: ^7}' + ''.join(f'|{rep_inf(dbm[x1, x2]): ^5}' for x2, _ in enumerate(names)) + '\n'
 
+    print(s)
 
-    elif command[0] == 'LUextrapolate':
-        if current_dbm is None:
-            print("No DBM selected, create one with the new command")
-            continue
-        dbm = dbms[current_dbm]
 
-        if len(command) != 5:
-            print('Incorrect command usage, extrapolate <lower bound x> <upper bound x> <lower bound y> <upper bound y>')
-            continue
+def _cmd_free(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+        return
 
-        for i in range(1, len(command)):
-            if not command[i].isdigit():
-                print(f'{command[i]} is not an integer')
-                continue
-        L = [infinity, int(command[1]), int(command[3])]
-        U = [infinity, int(command[2]), int(command[4])]
+    match = free_re.fullmatch(''.join(command[1:]))
+    if len(command) != 2 or match is None:
+        print('Incorrect command usage, free <constraint>, e.g. x-0, 0-y, y-x, ...')
+        return
 
-        for x1 in [0,1,2]:
-            for x2 in [0,1,2]:
-                if x1 == x2:
-                    continue
-                if dbm[x1,x2] > L[x1]:
-                    dbm[x1,x2] = infinity
-                elif -dbm[x1,x2] > U[x2]:
-                    dbm[x1,x2] = -U[x2]
+    dbm = dbms[current_dbm]
+    x1 = ['0', 'x', 'y'].index(match[1])
+    x2 = ['0', 'x', 'y'].index(match[2])
 
-        dbm.canonize()
+    dbm.free(x1, x2)
 
 
-    elif command[0] == "show":
-        show_dbms = []
-        if len(command) == 1:
-            command.append(current_dbm)
+def _cmd_extrapolate(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+        return
+    dbm = dbms[current_dbm]
+
+    if len(command) > 3 or len(command) == 1:
+        print('Incorrect command usage, extrapolate <constant>, or extrapolate <x constant> <y constant>')
+        return
+
+    if not command[1].isdigit():
+        print(f'{command[1]} is not an integer')
+        return
+    M = [infinity] * 3
+    M[1] = int(command[1])
+    if len(command) == 2:
+        M[2] = M[1]
+    else:
+        if not command[2].isdigit():
+            print(f'{command[2]} is not an integer')
+            return
+        M[2] = int(command[2])
 
-        fail = False
-        for i in range(1, len(command)):
-            if not command[i] in dbms:
-                print(f"I don't know the DBM '{command[i]}'")
-                fail = True
-            else:
-                show_dbms.append(dbms[command[i]])
-        if fail:
-            continue
-
-        d = max((b for dbm in show_dbms for b in [dbm[1, 0], dbm[2, 0]] if b != infinity), default=infinity)
-        if d == infinity:
-            d = 5
-
-        is_non2d = lambda dbm: dbm[1, 0] == -dbm[0, 1] or dbm[2, 0] == -dbm[0, 2] or dbm[1, 2] == -dbm[2, 1]
-        show_dbms.sort(key=is_non2d)
-        axes_index = next((i for i, dbm in enumerate(show_dbms) if is_non2d(dbm)), len(show_dbms))
-
-        s = ""
-        for i, dbm_raw in enumerate(show_dbms):
-            dbm = dbm_raw.copy()
-            if dbm[1, 0] == infinity:
-                dbm[1, 0] = d + 0.5
-            if dbm[2, 0] == infinity:
-                dbm[2, 0] = d + 0.5
-            dbm.canonize()
-
-            if i == axes_index:
-                s += "\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n"
-
-            if dbm[1, 0] == -dbm[0, 1] and dbm[2, 0] == -dbm[0, 2]:
-                s += "\\node[circle, fill=" + dbm.color + "!80, inner sep=1.5] at (" + str(dbm[1, 0]) + "," + str(
-                    dbm[2, 0]) + ") {}; "
-            else:
-                if is_non2d(dbm):
-                    s += "\\draw[" + dbm.color + "!80, ultra thick] "
-                else:
-                    s += "\\path[fill=" + dbm.color + "!80] "
-                s += "\\DBMPath{" + str(dbm[1, 0]) + "}{" + str(dbm[2, 0]) + "}{" + str(dbm[0, 1]) + "}{" + str(
-                    dbm[0, 2]) + "}{" + str(dbm[1, 2]) + "}{" + str(dbm[2, 1]) + "}; \n"
+    dbm.extrapolate(M)
 
-        if len(show_dbms) == axes_index:
-            s += "\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n"
 
-        dir = tempfile.mkdtemp(None, f'dbmviz_')
-        with open(os.path.join(dir, 'dbm.tex'), 'w') as f:
-            f.write(tikz_str_prefix + s + tikz_str_suffix)
-        p = subprocess.run(['pdflatex', '-halt-on-error', 'dbm.tex'], cwd=dir, stdout=subprocess.PIPE,
-                           stderr=subprocess.PIPE)
-        if p.returncode != 0:
-            print(p.stdout.decode('utf-8'))
-            print(p.stderr.decode('utf-8'))
-            print(f"Unfortunately something went wrong, check the .tex file {os.path.join(dir, 'dbm.tex')}")
-            continue
-
-        subprocess.Popen(['xdg-open', 'dbm.pdf'], cwd=dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    elif command[0] == "tikz":
-        dbm = None
-        if len(command) > 2:
-            print("Incorrect command usage, tikz [name]")
-            continue
-        elif len(command) == 2:
-            if not command[1] in dbms:
-                print(f"I don't know the DBM '{command[1]}'")
+def _cmd_lu_extrapolate(command):
+    if current_dbm is None:
+        print("No DBM selected, create one with the new command")
+        return
+    dbm = dbms[current_dbm]
+
+    if len(command) != 5:
+        print('Incorrect command usage, extrapolate <lower bound x> <upper bound x> <lower bound y> <upper bound y>')
+        return
+
+    for i in range(1, len(command)):
+        if not command[i].isdigit():
+            print(f'{command[i]} is not an integer')
+            return
+    L = [infinity, int(command[1]), int(command[3])]
+    U = [infinity, int(command[2]), int(command[4])]
+
+    dbm.lu_extrapolate(L, U)
+
+
+# The DBMPath arguments of a 2-clock DBM, i.e. the entries x-0, y-0, 0-x, 0-y, x-y and y-x, with unbounded upper
+# bounds cut off at bound. On a canonical DBM, tightening an edge only has to tighten the paths through it, so the
+# cut is closed directly on the nine entries instead of canonizing a copy.
+def display_bounds(dbm, bound):
+    D = list(dbm.dbm)
+    unbounded = [clock for clock in (1, 2) if D[clock * 3] == infinity]
+    for clock in unbounded:
+        cut = min(bound, D[clock * 3])
+        for c1 in range(3):
+            d_in = 0 if c1 == clock else D[c1 * 3 + clock]
+            if d_in == infinity:
                 continue
-            else:
-                dbm = dbms[command[1]]
+            for c2 in range(3):
+                if c1 != c2 and d_in + cut + D[c2] < D[c1 * 3 + c2]:
+                    D[c1 * 3 + c2] = d_in + cut + D[c2]
+    return [D[3], D[6], D[1], D[2], D[5], D[7]]
+
+
+def _cmd_show(command):
+    global _preamble_format
+    show_dbms = []
+    if len(command) == 1:
+        command.append(current_dbm)
+
+    fail = False
+    for i in range(1, len(command)):
+        if not command[i] in dbms:
+            print(f"I don't know the DBM '{command[i]}'")
+            fail = True
         else:
-            dbm = dbms[current_dbm]
-
-        dir = tempfile.mkdtemp(None, f'dbmviz_')
-        d = max(dbm[1, 0], dbm[2, 0])
-        if d == infinity:
-            d = 5
-        dbm = dbm.copy()
-        if dbm[1, 0] == infinity:
-            dbm[1, 0] = d + 0.5
-        if dbm[2, 0] == infinity:
-            dbm[2, 0] = d + 0.5
-        dbm.canonize()
-
-        s = ""
-        if dbm[1, 0] == -dbm[0, 1] and dbm[2, 0] == -dbm[0, 2]:
-            s += "\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n"
-            s += "\\node[circle, fill=" + dbm.color + "!80, inner sep=1.5] at (" + str(dbm[1, 0]) + "," + str(
-                dbm[2, 0]) + ") {}; "
+            show_dbms.append(dbms[command[i]])
+    if fail:
+        return
+
+    d = max((b for dbm in show_dbms for b in [dbm[1, 0], dbm[2, 0]] if b != infinity), default=5)
+    # A lower bound above the cut off would make the drawn DBM empty
+    d = max([d] + [-dbm[0, c] for dbm in show_dbms for c in [1, 2]])
+
+    is_non2d = lambda dbm: dbm[1, 0] == -dbm[0, 1] or dbm[2, 0] == -dbm[0, 2] or dbm[1, 2] == -dbm[2, 1]
+    # Filled 2D DBMs are drawn first and the axes on top of them, so the flag decides both the order and the axes
+    flags = [is_non2d(dbm) for dbm in show_dbms]
+    show_dbms = [dbm for _, dbm in sorted(zip(flags, show_dbms), key=lambda e: e[0])]
+    axes_index = flags.count(False)
+
+    parts = []
+    for i, dbm in enumerate(show_dbms):
+        b = display_bounds(dbm, d + 0.5)
+
+        if i == axes_index:
+            parts.append("\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n")
+
+        if b[0] == -b[2] and b[1] == -b[3]:
+            parts.append("\\node[circle, fill=" + dbm.color + "!80, inner sep=1.5] at (" + str(b[0]) + "," +
+                         str(b[1]) + ") {}; ")
         else:
-            is_non2d = dbm[1, 0] == -dbm[0, 1] or dbm[2, 0] == -dbm[0, 2] or dbm[1, 2] == -dbm[2, 1]
-            if is_non2d:
-                s += "\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n"
-                s += "\\draw[" + dbm.color + "!80, ultra thick] "
+            if b[0] == -b[2] or b[1] == -b[3] or b[4] == -b[5]:
+                parts.append("\\draw[" + dbm.color + "!80, ultra thick] ")
             else:
-                s += "\\path[fill=" + dbm.color + "!80] "
-            s += "\\DBMPath{" + str(dbm[1, 0]) + "}{" + str(dbm[2, 0]) + "}{" + str(dbm[0, 1]) + "}{" + str(
-                dbm[0, 2]) + "}{" + str(dbm[1, 2]) + "}{" + str(dbm[2, 1]) + "}; \n"
-            if not is_non2d:
-                s += "\\DBMAxes{" + str(d) + "}{" + str(d) + "}"
-        print(s)
-
-    elif command[0] == "tikz-help":
-        print(
-            """To render the tikz output in latex, you must define these two macros once in your document:
+                parts.append("\\path[fill=" + dbm.color + "!80] ")
+            parts.append("\\DBMPath{" + "}{".join(str(v) for v in b) + "}; \n")
+
+    if len(show_dbms) == axes_index:
+        parts.append("\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n")
+    s = ''.join(parts)
+
+    dir = tempfile.mkdtemp(None, f'dbmviz_')
+    with open(os.path.join(dir, 'dbm.tex'), 'w') as f:
+        f.write(tikz_str_prefix + s + tikz_str_suffix)
+
+    p = None
+    preamble_format = get_preamble_format()
+    if preamble_format:
+        with open(os.path.join(dir, 'dbm_body.tex'), 'w') as f:
+            f.write(tikz_str_begin + s + tikz_str_suffix)
+        p = subprocess.run(['pdflatex', '-halt-on-error', f'-fmt={preamble_format}', '-jobname=dbm', 'dbm_body.tex'],
+                           cwd=dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # The full document does not depend on the format, so it is also the fallback when the format fails
+    if p is None or p.returncode != 0:
+        p = subprocess.run(['pdflatex', '-halt-on-error', 'dbm.tex'], cwd=dir, stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE)
+        if preamble_format and p.returncode == 0:
+            _preamble_format = False
+    if p.returncode != 0:
+        print(p.stdout.decode('utf-8'))
+        print(p.stderr.decode('utf-8'))
+        print(f"Unfortunately something went wrong, check the .tex file {os.path.join(dir, 'dbm.tex')}")
+        return
+
+    subprocess.Popen(['xdg-open', 'dbm.pdf'], cwd=dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _cmd_tikz(command):
+    dbm = None
+    if len(command) > 2:
+        print("Incorrect command usage, tikz [name]")
+        return
+    elif len(command) == 2:
+        if not command[1] in dbms:
+            print(f"I don't know the DBM '{command[1]}'")
+            return
+        else:
+            dbm = dbms[command[1]]
+    else:
+        dbm = dbms[current_dbm]
+
+    d = max(dbm[1, 0], dbm[2, 0])
+    if d == infinity:
+        d = max(5, -dbm[0, 1], -dbm[0, 2])
+    b = display_bounds(dbm, d + 0.5)
+
+    parts = []
+    if b[0] == -b[2] and b[1] == -b[3]:
+        parts.append("\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n")
+        parts.append("\\node[circle, fill=" + dbm.color + "!80, inner sep=1.5] at (" + str(b[0]) + "," +
+                     str(b[1]) + ") {}; ")
+    else:
+        is_non2d = b[0] == -b[2] or b[1] == -b[3] or b[4] == -b[5]
+        if is_non2d:
+            parts.append("\\DBMAxes{" + str(d) + "}{" + str(d) + "}\n")
+            parts.append("\\draw[" + dbm.color + "!80, ultra thick] ")
+        else:
+            parts.append("\\path[fill=" + dbm.color + "!80] ")
+        parts.append("\\DBMPath{" + "}{".join(str(v) for v in b) + "}; \n")
+        if not is_non2d:
+            parts.append("\\DBMAxes{" + str(d) + "}{" + str(d) + "}")
+    print(''.join(parts))
+
+
+def _cmd_tikz_help(command):
+    print(
+        """To render the tikz output in latex, you must define these two macros once in your document:
 \\newcommand{\\DBMPath}[6]{
 (\\fpeval{-(#3)},\\fpeval{-(#4)}) -- (\\fpeval{(#5) - (#4)}, \\fpeval{-(#4)}) -- (#1, \\fpeval{(#1) - (#5)}) -- (#1, #2) -- (\\fpeval{(#2) - (#6)}, #2) -- (\\fpeval{-(#3)}, \\fpeval{(#6) - (#3)}) -- cycle
 }
@@ -595,15 +760,16 @@ Finally, to render the DBM, simply place the macro calls into a tikzpicture envi
 \DBMAxes{4}{4}
 \\end{tikzpicture}
 """
-        )
+    )
 
 
-    elif command[0] == "quit":
-        exit(0)
+def _cmd_quit(command):
+    exit(0)
 
-    elif command[0] == "help":
-        print(
-            """This is an interactive tool to play with Difference Bound Matrices (DBMs).
+
+def _cmd_help(command):
+    print(
+        """This is an interactive tool to play with Difference Bound Matrices (DBMs).
 Commands:
 example - runs the example from below
 new <true|false|zero> [name] - Create a new DBM, if no name is given, a new name is generated
@@ -635,5 +801,97 @@ print // Print the constraints of the current DBM, the constraints x >= 0, y >=
 show // Shows a visual presentation of the DBM
 """)
 
-    else:
+
+# Constraints are not keyword commands, so they are only parsed when no keyword matches
+def _cmd_constraint(command):
+    constraint = parse_constraint(command)
+    if constraint is None:
         print(f"Unknown command '{command[0]}', try help for a list of commands")
+        return
+
+    names, op, value = constraint
+    # Bounds from infinity and up cannot be told apart from no bound, and would not fit the storage
+    if abs(value) >= infinity:
+        print(f"Constants must be smaller than {infinity} in absolute value")
+        return
+
+    dbm = dbms[current_dbm]
+
+    clock = [0, 0]
+    for i, name in enumerate(names):
+        if name == "x":
+            clock[i] = 1
+        elif name == "y":
+            clock[i] = 2
+        else:
+            print(f"Unknown clock '{name}', try x or y")
+            return
+
+    if len(names) == 1:
+        if value < 0:
+            print("Cannot constrain to negative value")
+            return
+
+        if op == "<=" or op == "<":
+            dbm.leq(clock[0], 0, value)
+        elif op == ">=" or op == ">":
+            dbm.leq(0, clock[0], -value)
+        elif op == "=" or op == "==":
+            dbm.leq(clock[0], 0, value)
+            dbm.leq(0, clock[0], -value)
+
+    else:
+        if op == "<=" or op == "<":
+            dbm.leq(clock[0], clock[1], value)
+        elif op == ">=" or op == ">":
+            dbm.leq(clock[1], clock[0], -value)
+        elif op == "=" or op == "==":
+            dbm.leq(clock[0], clock[1], value)
+            dbm.leq(clock[1], clock[0], -value)
+
+
+commands = {
+    'example': _cmd_example,
+    'new': _cmd_new,
+    'copy': _cmd_copy,
+    'select': _cmd_select,
+    'print': _cmd_print,
+    'up': _cmd_up,
+    'down': _cmd_down,
+    'reset': _cmd_reset,
+    'color': _cmd_color,
+    'dbm': _cmd_dbm,
+    'free': _cmd_free,
+    'extrapolate': _cmd_extrapolate,
+    'LUextrapolate': _cmd_lu_extrapolate,
+    'show': _cmd_show,
+    'tikz': _cmd_tikz,
+    'tikz-help': _cmd_tikz_help,
+    'quit': _cmd_quit,
+    'help': _cmd_help,
+}
+
+
+def repl():
+    # Bound once, the handlers do not change them. current_dbm does change, so it is still read as a global.
+    read_command = get_input
+    get_handler = commands.get
+    constraint_handler = _cmd_constraint
+    while True:
+        if current_dbm is None:
+            print("-: ", end="")
+        else:
+            print(f"{current_dbm}: ", end="")
+
+        command = read_command().split(' ')
+        get_handler(command[0], constraint_handler)(command)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 2:
+        queued_commands = sys.argv[1].split(';')
+    elif len(sys.argv) != 1:
+        print("Incorrect command usage, try dbmviz.py [commands]. Commands are in quotes and separated by ';'")
+        exit(1)
+
+    repl()